@@ -0,0 +1,105 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Executor
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces single-image inference requests that arrive within `window_s`
+    (up to `max_batch` items) into one `infer_batch(images)` call executed on
+    `executor`. Each caller awaits its own result via `submit()`.
+
+    Pending items are appended to a plain list and combined once per flush by
+    `collate` (default: pass the list through). Adapters that consume a single
+    fixed-size batch can pass e.g. `app.utils.tensor.to_tensor` to stack once at
+    flush time instead of growing a batch tensor per request.
+    """
+
+    def __init__(
+        self,
+        infer_batch: Callable[[Any], List[Dict[str, Any]]],
+        executor: Optional[Executor] = None,
+        window_s: float = 0.005,
+        max_batch: int = 8,
+        collate: Optional[Callable[[List[Any]], Any]] = None,
+    ):
+        self._infer_batch = infer_batch
+        self._collate = collate
+        self._executor = executor
+        self.window_s = max(0.0, float(window_s))
+        self.max_batch = max(1, int(max_batch))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="yolo-microbatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # fail anything that was queued but never flushed
+        leftover = list(self._pending)
+        self._pending = []
+        while self._queue is not None and not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        for _, fut in leftover:
+            if not fut.done():
+                fut.set_exception(RuntimeError("micro-batcher stopped"))
+
+    async def submit(self, image: Any) -> Dict[str, Any]:
+        if self._queue is None:
+            raise RuntimeError("micro-batcher not started")
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, fut))
+        return await fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        assert self._queue is not None
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.window_s
+            while len(self._pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # items stay in _pending until flushed so stop() can fail them if cancelled
+            await self._flush(self._pending)
+            self._pending = []
+
+    def _run_batch(self, images: List[Any]) -> List[Dict[str, Any]]:
+        # collate inside the executor so stacking doesn't block the event loop
+        batch = self._collate(images) if self._collate is not None else images
+        return self._infer_batch(batch)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        images = [image for image, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, self._run_batch, images)
+        except Exception as e:
+            logger.exception("Batched inference failed for %d image(s)", len(images))
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for i, (_, fut) in enumerate(batch):
+            if fut.done():
+                continue
+            if i < len(results):
+                fut.set_result(results[i])
+            else:
+                fut.set_exception(RuntimeError("batched inference returned too few results"))
@@ -3,22 +3,34 @@ import os
 
 from .loader import get_model
 from .model import BaseModel
+from .utils.postprocess import SCHEMA_AOS, SCHEMA_SOA, SCHEMA_STRUCT
+
+OUTPUT_SCHEMAS = {SCHEMA_AOS, SCHEMA_SOA, SCHEMA_STRUCT}
 
 def predict_inproc(
     image_path: str,
     model: Optional[BaseModel] = None,
     adapter: Optional[str] = None,
     weights: Optional[str] = None,
+    output: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Run a prediction in-process.
 
     - If 'model' is provided it is used directly.
     - Otherwise get_model(adapter, weights) is used (falls back to env vars/defaults).
+    - output selects the detections layout: "aos" / "soa" (default: SCHEMA env) or
+      "struct" for a numpy record array (fields x1, y1, x2, y2, score, class_id).
     """
+    if output is not None and output not in OUTPUT_SCHEMAS:
+        raise ValueError(f"unsupported output {output!r}; expected one of {sorted(OUTPUT_SCHEMAS)}")
+
     if model is None:
         adapter = adapter or os.getenv("MODEL_ADAPTER", "stub")
         weights = weights or os.getenv("MODEL_WEIGHTS", None)
         model = get_model(adapter=adapter, weights=weights)
 
-    return model.infer(image_path)
\ No newline at end of file
+    if output is None:
+        # keep adapters written against the original infer(image_path) contract working
+        return model.infer(image_path)
+    return model.infer(image_path, schema=output)
\ No newline at end of file
@@ -1,17 +1,65 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from collections import OrderedDict
+import ast
 import os
-import tempfile
 import logging
+import threading
 from pathlib import Path
 
+import numpy as np
+
 from .model import BaseModel, StubModel
-from .utils.postprocess import format_detections
+from .utils.nms import nms
+from .utils.preprocess import decode_image_bytes, letterbox, to_model_input
+from .utils.postprocess import (
+    SCHEMA_SOA,
+    SCHEMA_STRUCT,
+    build_labels_list,
+    detection_schema,
+    decode_yolo_output,
+    empty_detections,
+    format_detections_np,
+    format_detections_soa,
+    format_detections_struct,
+)
 
 logger = logging.getLogger(__name__)
 
 # project root (one level above app/)
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
+# defaults for the ONNX Runtime backend (mirror ultralytics predict defaults)
+ONNX_IMGSZ = 640
+ONNX_CONF_THRESHOLD = 0.25
+ONNX_IOU_THRESHOLD = 0.7
+
+# MODEL_PRECISION values: fp16 applies to CUDA torch inference, int8 to the ONNX backend
+PRECISIONS = ("fp32", "fp16", "int8")
+
+def _to_numpy(x: Any, dtype: Any) -> np.ndarray:
+    """
+    Convert a tensor / array / list to a 1-D or 2-D numpy array without going through
+    python lists. Torch tensors are detached and moved to CPU (zero-copy if already there).
+    """
+    if x is None:
+        return np.zeros((0,), dtype=dtype)
+    if hasattr(x, "detach"):
+        x = x.detach().cpu().numpy()
+    return np.asarray(x).astype(dtype, copy=False)
+
+
+def _decode_bgr(image_bytes: bytes) -> np.ndarray:
+    """Decode image bytes to an HxWx3 BGR array, with OpenCV if installed, else Pillow."""
+    try:
+        import cv2  # type: ignore
+    except Exception:
+        return decode_image_bytes(image_bytes)
+    arr = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if arr is None:
+        raise ValueError("could not decode image bytes")
+    return arr
+
+
 class YolovXAdapter(BaseModel):
     """
     Adapter for Ultralytics YOLO (best-effort parsing). If ultralytics isn't installed
@@ -22,9 +70,34 @@ class YolovXAdapter(BaseModel):
         self.model = None
         self.mode = "dry-run"
         self.names: Dict[int, str] = {}
+        self._labels_list: List[str] = []
         self.version = None
+        # "ultralytics" (torch via YOLO) or "onnx" (onnxruntime session)
+        self.backend = "ultralytics"
+        self.session = None
+        self.imgsz = (ONNX_IMGSZ, ONNX_IMGSZ)
+        self.precision = "fp32"
+        # extra kwargs passed to ultralytics predict (e.g. half=True)
+        self._predict_overrides: Dict[str, Any] = {}
 
     def load(self, weights_path: Optional[str] = None) -> None:
+        precision = os.getenv("MODEL_PRECISION", "fp32").lower()
+        if precision not in PRECISIONS:
+            logger.warning("Unknown MODEL_PRECISION=%s, using fp32", precision)
+            precision = "fp32"
+        self.precision = precision
+
+        # int8 is only implemented via ONNX Runtime dynamic quantization
+        use_onnx = os.getenv("EXPORT_BACKEND", "").lower() == "onnx" or precision == "int8"
+        if use_onnx and weights_path and os.path.exists(weights_path):
+            try:
+                if self._load_onnx(weights_path):
+                    return
+            except Exception as e:
+                logger.exception("ONNX backend setup failed, falling back to ultralytics: %s", e)
+                self.session = None
+                self.backend = "ultralytics"
+
         try:
             from ultralytics import YOLO  # type: ignore
             import ultralytics as ul
@@ -38,6 +111,8 @@ class YolovXAdapter(BaseModel):
                     self.model = YOLO(weights_path)
                     self.mode = "inference"
                     logger.info("YolovXAdapter loaded model from weights -> mode=%s", self.mode)
+                    self._configure_precision()
+                    self._init_predictor()
                 except Exception as e:
                     logger.exception("Failed to instantiate YOLO from weights: %s", e)
                     self.model = None
@@ -58,18 +133,130 @@ class YolovXAdapter(BaseModel):
                 self.names = getattr(self.model, "names", {}) or {}
             except Exception:
                 self.names = {}
+            self._labels_list = build_labels_list(self.names)
         except Exception as e:
             # ultralytics not installed -> dry run
             logger.debug("Ultralytics import failed: %s", e)
             self.model = None
             self.mode = "dry-run"
             self.names = {}
+            self._labels_list = []
+
+    def _load_onnx(self, weights_path: str) -> bool:
+        """
+        Export `.pt` weights to ONNX once (cached next to the weights) and open an
+        onnxruntime CPU session. Returns False if onnxruntime isn't installed.
+        """
+        try:
+            import onnxruntime as ort  # type: ignore
+        except Exception as e:
+            logger.warning("ONNX backend requested but onnxruntime is unavailable: %s", e)
+            return False
+
+        w = Path(weights_path)
+        onnx_path = w if w.suffix == ".onnx" else w.with_suffix(".onnx")
+        if not onnx_path.exists():
+            if w.suffix != ".pt":
+                logger.warning("Cannot export %s to ONNX (expected .pt weights)", w)
+                return False
+            from ultralytics import YOLO  # type: ignore
+            logger.info("Exporting %s to ONNX (imgsz=%s)", w, ONNX_IMGSZ)
+            onnx_path = Path(YOLO(str(w)).export(format="onnx", simplify=True, imgsz=ONNX_IMGSZ))
+
+        if self.precision == "int8":
+            onnx_path = self._quantize_int8(onnx_path)
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = os.cpu_count() or 1
+        try:
+            self.session = ort.InferenceSession(str(onnx_path), sess_options=opts, providers=["CPUExecutionProvider"])
+        except Exception:
+            # don't keep a quantized graph this runtime can't load; the next start re-quantizes
+            if self.precision == "int8":
+                onnx_path.unlink(missing_ok=True)
+            raise
+
+        # ultralytics stores class names and input size in the ONNX metadata
+        meta = self.session.get_modelmeta().custom_metadata_map
+        try:
+            self.names = ast.literal_eval(meta.get("names", "{}")) or {}
+        except Exception:
+            self.names = {}
+        try:
+            imgsz = ast.literal_eval(meta.get("imgsz", "None")) or ONNX_IMGSZ
+            self.imgsz = tuple(imgsz) if isinstance(imgsz, (list, tuple)) else (int(imgsz), int(imgsz))
+        except Exception:
+            self.imgsz = (ONNX_IMGSZ, ONNX_IMGSZ)
+        self._labels_list = build_labels_list(self.names)
+        self.version = meta.get("version") or getattr(ort, "__version__", None)
+        self.backend = "onnx"
+        self.mode = "inference"
+        logger.info("YolovXAdapter loaded ONNX model %s -> mode=%s", onnx_path, self.mode)
+        return True
+
+    def _quantize_int8(self, onnx_path: Path) -> Path:
+        """
+        Dynamically quantize weights to 8 bits once, cached as <name>.int8.onnx.
+        Weights are uint8: dynamic quantization turns Conv into ConvInteger, which the
+        ORT CPU provider only implements for uint8 activations *and* uint8 weights.
+        """
+        quant_path = onnx_path.with_name(f"{onnx_path.stem}.int8.onnx")
+        if not quant_path.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+            logger.info("Quantizing %s -> %s (int8 dynamic)", onnx_path, quant_path)
+            quantize_dynamic(str(onnx_path), str(quant_path), weight_type=QuantType.QUInt8)
+        return quant_path
+
+    def _configure_precision(self) -> None:
+        """fp16 only makes sense on CUDA; ultralytics halves the model when predict gets half=True."""
+        if self.precision == "fp16":
+            try:
+                import torch  # type: ignore
+                cuda = torch.cuda.is_available()
+            except Exception:
+                cuda = False
+            if cuda:
+                self._predict_overrides = {"half": True}
+            else:
+                logger.warning("MODEL_PRECISION=fp16 requires CUDA; running fp32")
+        elif self.precision == "int8":
+            logger.warning("MODEL_PRECISION=int8 requires the ONNX backend; running fp32")
+
+    def _infer_onnx(self, image: np.ndarray, image_path: str, schema: Optional[str] = None) -> Dict[str, Any]:
+        """Letterbox + normalize in NumPy, run the ORT session, decode and NMS."""
+        h, w = image.shape[:2]
+        padded, scale, pad = letterbox(image, self.imgsz)
+        inp = self.session.get_inputs()[0].name
+        pred = self.session.run(None, {inp: to_model_input(padded)})[0]
+        boxes, scores, classes = decode_yolo_output(pred, ONNX_CONF_THRESHOLD, scale, pad, (h, w))
+        return self._parse_raw(boxes, scores, classes, image_path, width=w, height=h, iou_thr=ONNX_IOU_THRESHOLD, schema=schema)
+
+    def _init_predictor(self) -> None:
+        """
+        Run one tiny prediction so ultralytics materializes `model.predictor`
+        (loader, preprocessing, NMS setup); later calls reuse it directly.
+        """
+        try:
+            self.model.predict(source=np.zeros((32, 32, 3), dtype=np.uint8), verbose=False, **self._predict_overrides)
+        except Exception:
+            logger.debug("Predictor warmup failed; falling back to model.predict per call", exc_info=True)
+
+    def _predict(self, source: Any) -> Any:
+        """Run the cached predictor if available, otherwise model.predict / model(...)."""
+        predictor = getattr(self.model, "predictor", None)
+        if predictor is not None:
+            return predictor(source=source, stream=False)
+        # prefer predict API if available
+        if hasattr(self.model, "predict"):
+            return self.model.predict(source=source, verbose=False, **self._predict_overrides)
+        return self.model(source)
 
-    def _parse_results(self, results: Any, image_path: str) -> Dict[str, Any]:
+    def _parse_results(self, results: Any, image_path: str, schema: Optional[str] = None) -> Dict[str, Any]:
         """
         Best-effort conversion from ultralytics Results -> stable schema.
         """
-        detections: List[Dict[str, Any]] = []
+        schema = schema or detection_schema()
+        detections: Any = empty_detections(schema)
         width = None
         height = None
 
@@ -83,40 +270,18 @@ class YolovXAdapter(BaseModel):
 
             boxes_obj = getattr(r, "boxes", None)
             if boxes_obj is None:
-                return {"image": image_path, "width": width, "height": height, "detections": [], "model": {"adapter": "yolovx", "mode": self.mode, "version": self.version}}
+                return {"image": image_path, "width": width, "height": height, "detections": detections, "model": {"adapter": "yolovx", "mode": self.mode, "version": self.version}}
 
             # boxes_obj may expose xyxy, conf, cls as tensors or lists
             xyxy = getattr(boxes_obj, "xyxy", None)
             confs = getattr(boxes_obj, "conf", None)
             clss = getattr(boxes_obj, "cls", None)
 
-            # convert to python lists
-            if xyxy is not None:
-                try:
-                    boxes = xyxy.cpu().numpy().tolist()  # type: ignore
-                except Exception:
-                    try:
-                        boxes = list(xyxy)  # last resort
-                    except Exception:
-                        boxes = []
-            else:
-                boxes = []
-
-            if confs is not None:
-                try:
-                    scores = confs.cpu().numpy().tolist()  # type: ignore
-                except Exception:
-                    scores = list(confs)
-            else:
-                scores = [0.0] * len(boxes)
-
-            if clss is not None:
-                try:
-                    classes = clss.cpu().numpy().tolist()  # type: ignore
-                except Exception:
-                    classes = list(clss)
-            else:
-                classes = [0] * len(boxes)
+            # keep as numpy arrays; format_detections_np converts each field with one tolist()
+            boxes = _to_numpy(xyxy, np.float32).reshape(-1, 4)
+            n = len(boxes)
+            scores = _to_numpy(confs, np.float32) if confs is not None else np.zeros(n, dtype=np.float32)
+            classes = _to_numpy(clss, np.int64) if clss is not None else np.zeros(n, dtype=np.int64)
 
             # normalize lengths
             n = min(len(boxes), len(scores), len(classes))
@@ -124,53 +289,104 @@ class YolovXAdapter(BaseModel):
             scores = scores[:n]
             classes = classes[:n]
 
-            detections = format_detections(boxes, scores, classes, names=self.names)
+            detections = self._format(boxes, scores, classes, schema)
         except Exception:
             # on any parsing failure return an empty detections list but keep schema
-            detections = []
+            detections = empty_detections(schema)
+
+        return {"image": image_path, "width": width, "height": height, "detections": detections, "model": {"adapter": "yolovx", "mode": self.mode, "version": self.version}}
+
+    def _format(self, boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, schema: str) -> Any:
+        if schema == SCHEMA_SOA:
+            return format_detections_soa(boxes, scores, classes, labels_list=self._labels_list)
+        if schema == SCHEMA_STRUCT:
+            return format_detections_struct(boxes, scores, classes)
+        return format_detections_np(boxes, scores, classes, labels_list=self._labels_list)
+
+    def _parse_raw(
+        self,
+        boxes: Any,
+        scores: Any,
+        classes: Any,
+        image_path: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        iou_thr: float = 0.45,
+        schema: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the stable schema from raw (pre-NMS) xyxy boxes, scores and class ids,
+        e.g. outputs of a non-ultralytics runtime. Applies class-aware NMS first.
+        """
+        schema = schema or detection_schema()
+        boxes = _to_numpy(boxes, np.float32).reshape(-1, 4)
+        scores = _to_numpy(scores, np.float32).reshape(-1)
+        classes = _to_numpy(classes, np.int64).reshape(-1)
+        n = min(len(boxes), len(scores), len(classes))
+        boxes, scores, classes = boxes[:n], scores[:n], classes[:n]
 
+        keep = nms(boxes, scores, iou_thr=iou_thr, classes=classes)
+        detections = self._format(boxes[keep], scores[keep], classes[keep], schema)
         return {"image": image_path, "width": width, "height": height, "detections": detections, "model": {"adapter": "yolovx", "mode": self.mode, "version": self.version}}
 
-    def infer(self, image_path: str) -> Dict[str, Any]:
+    def infer(self, image_path: str, schema: Optional[str] = None) -> Dict[str, Any]:
+        if self.session is not None:
+            return self._infer_onnx(decode_image_bytes(Path(image_path).read_bytes()), image_path, schema)
+
         if self.model is None:
             # dry-run: return stable schema with empty detections
-            return {"image": image_path, "width": None, "height": None, "detections": [], "model": {"adapter": "yolovx", "mode": self.mode, "version": self.version}}
+            return {"image": image_path, "width": None, "height": None, "detections": empty_detections(schema), "model": {"adapter": "yolovx", "mode": self.mode, "version": self.version}}
 
-        # run prediction using model.predict or model(image_path) depending on ul version
+        # run prediction using the cached predictor, model.predict or model(image_path)
         try:
-            # prefer predict API if available
-            if hasattr(self.model, "predict"):
-                results = self.model.predict(source=image_path)
-            else:
-                results = self.model(image_path)
-            return self._parse_results(results, image_path)
+            results = self._predict(image_path)
+            return self._parse_results(results, image_path, schema)
         except Exception:
             # bubble up to service boundary to produce 500
             raise
 
     def infer_bytes(self, image_bytes: bytes) -> Dict[str, Any]:
-        t = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-        t.write(image_bytes)
-        t.close()
-        return self.infer(t.name)
+        if self.session is not None:
+            return self._infer_onnx(decode_image_bytes(image_bytes), "<bytes>")
+        if self.model is None:
+            return self.infer("<bytes>")
 
+        # decode in memory and hand ultralytics an ndarray: no tempfile write + re-read
+        results = self._predict(_decode_bgr(image_bytes))
+        return self._parse_results(results, "<bytes>")
 
-def get_model(adapter: str = "stub", weights: Optional[str] = None) -> BaseModel:
-    """
-    Factory to produce a BaseModel implementation.
-    - adapter: "stub" or "yolovx" (future adapters can be added)
-    - weights: optional path to weights file for real adapters
-    """
-    adapter = (adapter or "stub").lower()
-    # accept a few common aliases and normalize to the yolovx adapter
-    if adapter.startswith("yolo") or adapter.startswith("yolov") or "yolovx" in adapter or "yolov" in adapter:
-        chosen = "yolovx"
-    elif adapter in ("yolovx", "yolox"):
-        chosen = "yolovx"
-    else:
-        chosen = "stub"
-
-    # normalize weights path: allow relative paths in .env (relative to project root)
+    def infer_batch(self, images: List[Any], image_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        names = image_names or [f"<image:{i}>" for i in range(len(images))]
+        if self.session is not None:
+            # exported graph has a fixed batch of 1
+            return [self._infer_onnx(img, name) for img, name in zip(images, names)]
+        if self.model is None or not images:
+            return [self.infer(name) for name in names]
+
+        # ultralytics treats a list of ndarrays as a single batch: one forward pass and one NMS
+        results = self._predict(list(images))
+        return [self._parse_results(r, name) for r, name in zip(results, names)]
+
+
+# accept a few common aliases and normalize to the yolovx adapter
+_ADAPTER_ALIASES = {
+    "yolo": "yolovx",
+    "yolov5": "yolovx",
+    "yolov8": "yolovx",
+    "yolovx": "yolovx",
+    "yolox": "yolovx",
+    "stub": "stub",
+}
+
+def _resolve_adapter(adapter: str) -> str:
+    chosen = _ADAPTER_ALIASES.get(adapter)
+    if chosen is None:
+        # model-named adapters such as "yolov12n" or "yolo11s" also map to the YOLO adapter
+        chosen = "yolovx" if adapter.startswith("yolo") or "yolov" in adapter else "stub"
+    return chosen
+
+def resolve_weights_path(weights: Optional[str]) -> Optional[str]:
+    """Normalize a weights path: allow relative paths in .env (relative to project root)."""
     if weights:
         try:
             w = Path(weights).expanduser()
@@ -179,18 +395,83 @@ def get_model(adapter: str = "stub", weights: Optional[str] = None) -> BaseModel
             weights = str(w)
         except Exception:
             logger.debug("Could not normalize weights path: %s", weights, exc_info=True)
+    return weights
+
+def prefetch_weights(weights: Optional[str], chunk_size: int = 4 * 1024 * 1024) -> None:
+    """
+    Pull a weights file into the OS page cache so the subsequent model load reads
+    from RAM. Hints the kernel with POSIX_FADV_WILLNEED where supported, then reads
+    the file through in chunks. Best effort: errors are logged and ignored.
+    """
+    path = resolve_weights_path(weights)
+    if not path or not os.path.isfile(path):
+        return
+    try:
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            while f.read(chunk_size):
+                pass
+        logger.info("Prefetched weights into page cache: %s", path)
+    except Exception:
+        logger.debug("Weights prefetch failed for %s", path, exc_info=True)
+
+# loaded models keyed by (adapter, weights, backend, precision), least recently used first.
+# The lock makes concurrent get_model calls for the same model wait instead of loading twice.
+_MODEL_CACHE: "OrderedDict[Tuple[str, str, str, str], BaseModel]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def clear_model_cache() -> None:
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE.clear()
+
+def get_model(adapter: str = "stub", weights: Optional[str] = None) -> BaseModel:
+    """
+    Factory to produce a BaseModel implementation.
+    - adapter: "stub" or "yolovx" (future adapters can be added)
+    - weights: optional path to weights file for real adapters
+
+    Loaded models are cached per (adapter, weights, EXPORT_BACKEND, MODEL_PRECISION)
+    with LRU eviction beyond MAX_MODELS (default 2): repeated calls return the same
+    shared instance. Use clear_model_cache() to force a reload.
+    """
+    adapter = (adapter or "stub").lower()
+    chosen = _resolve_adapter(adapter)
+
+    weights = resolve_weights_path(weights)
 
     logger.info("Requested adapter='%s' normalized='%s' weights=%s", adapter, chosen, weights)
 
-    if chosen == "yolovx":
-        m = YolovXAdapter()
-    else:
-        m = StubModel()
+    key = (
+        chosen,
+        weights or "",
+        os.getenv("EXPORT_BACKEND", "").lower(),
+        os.getenv("MODEL_PRECISION", "fp32").lower(),
+    )
+    with _MODEL_CACHE_LOCK:
+        cached = _MODEL_CACHE.get(key)
+        if cached is not None:
+            _MODEL_CACHE.move_to_end(key)
+            logger.info("Model cache hit: adapter=%s weights=%s", chosen, weights)
+            return cached
 
-    try:
-        m.load(weights)
-    except Exception as e:
-        logger.exception("Model.load() raised an exception: %s", e)
+        if chosen == "yolovx":
+            m = YolovXAdapter()
+        else:
+            m = StubModel()
+
+        try:
+            m.load(weights)
+        except Exception as e:
+            logger.exception("Model.load() raised an exception: %s", e)
+
+        logger.info("Model loaded: adapter=%s mode=%s", chosen, getattr(m, "mode", None))
 
-    logger.info("Model loaded: adapter=%s mode=%s", chosen, getattr(m, "mode", None))
-    return m
\ No newline at end of file
+        # don't pin a model that failed to find its weights; a later call may succeed
+        if getattr(m, "mode", None) != "no-weights":
+            _MODEL_CACHE[key] = m
+            max_models = max(1, int(os.getenv("MAX_MODELS", "2")))
+            while len(_MODEL_CACHE) > max_models:
+                evicted, _ = _MODEL_CACHE.popitem(last=False)
+                logger.info("Evicted model from cache: %s", evicted)
+        return m
\ No newline at end of file
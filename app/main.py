@@ -1,11 +1,17 @@
-# FastAPI app (health + /predict placeholder)
+# FastAPI app (health + /predict + /predict_batch)
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
 from pathlib import Path
+from typing import Any, List, Optional
+import orjson
 import uuid
 from contextlib import asynccontextmanager
-from .loader import get_model
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from .loader import get_model, prefetch_weights
 from .model import BaseModel
+from .batching import MicroBatcher
+from .utils.preprocess import decode_image_bytes
 import logging
 import asyncio
 import os
@@ -19,19 +25,30 @@ logger = logging.getLogger(__name__)
 
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5 MiB
 ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
+MAX_BATCH_FILES = 16
+MAX_IMAGE_PIXELS = 25_000_000  # ~75 MB per decoded RGB array
+
+# tiny blank image used to run one inference at startup
+WARMUP_IMAGE = Path(__file__).resolve().parent / "assets" / "warmup.jpg"
 
 MODEL = None
 UPLOAD_DIR: Path = Path("uploads")
+# uploads are only written to UPLOAD_DIR when PERSIST_UPLOADS=1
+PERSIST_UPLOADS: bool = False
+
+class ORJSONResponse(JSONResponse):
+    # orjson encodes in C and handles numpy arrays natively; defined locally because
+    # fastapi.responses.ORJSONResponse is deprecated in recent FastAPI releases
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global MODEL, UPLOAD_DIR
+    global MODEL, UPLOAD_DIR, PERSIST_UPLOADS
     # allow selecting adapter and weights via environment
     adapter = os.getenv("MODEL_ADAPTER", "stub")
     weights = os.getenv("MODEL_WEIGHTS", None)
     logger.info("Starting up: adapter=%s weights=%s", adapter, weights)
-    MODEL = get_model(adapter=adapter, weights=weights)
-    logger.info("Startup complete: model_mode=%s", getattr(MODEL, "mode", None))
 
     # configure uploads directory from env (so tests can override via env before TestClient)
     upload_env = os.getenv("UPLOAD_DIR", None)
@@ -39,15 +56,65 @@ async def lifespan(app: FastAPI):
         UPLOAD_DIR = Path(upload_env)
     else:
         UPLOAD_DIR = Path("uploads")
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "0").lower() in ("1", "true", "yes")
+    if PERSIST_UPLOADS:
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+    # bounded pool for model calls: serializes inference (INFER_WORKERS=1 by default)
+    # instead of fanning out across the default executor's threads
+    app.state.infer_pool = ThreadPoolExecutor(
+        max_workers=max(1, int(os.getenv("INFER_WORKERS", "1"))),
+        thread_name_prefix="yolo-infer",
+    )
+
+    # read the weights file into the page cache while the model load (framework
+    # imports, backend init) runs in another thread, so the disk read overlaps it
+    _, MODEL = await asyncio.gather(
+        asyncio.to_thread(prefetch_weights, weights),
+        asyncio.to_thread(get_model, adapter=adapter, weights=weights),
+    )
+    logger.info("Startup complete: model_mode=%s", getattr(MODEL, "mode", None))
 
-    yield
+    # warm up real models so the first request doesn't pay lazy init / kernel autotune
+    if getattr(MODEL, "mode", None) == "inference":
+        try:
+            await asyncio.get_running_loop().run_in_executor(app.state.infer_pool, MODEL.infer, str(WARMUP_IMAGE))
+            logger.info("Model warmup complete")
+        except Exception:
+            logger.warning("Model warmup failed; continuing startup", exc_info=True)
+
+    # optional micro-batching of single /predict requests (BATCH_WINDOW_MS=0 disables)
+    app.state.batcher = None
+    window_ms = float(os.getenv("BATCH_WINDOW_MS", "0"))
+    if window_ms > 0:
+        model = MODEL
+
+        def _infer_micro_batch(images: List[Any]) -> List[Any]:
+            # same image name as the unbatched infer_bytes path so responses don't change
+            return model.infer_batch(images, ["<bytes>"] * len(images))
+
+        app.state.batcher = MicroBatcher(
+            _infer_micro_batch,
+            executor=app.state.infer_pool,
+            window_s=window_ms / 1000.0,
+            max_batch=int(os.getenv("BATCH_MAX_SIZE", "8")),
+        )
+        app.state.batcher.start()
+        logger.info("Micro-batching enabled: window=%sms max_batch=%s", window_ms, app.state.batcher.max_batch)
 
-    # shutdown / cleanup
-    MODEL = None
+    try:
+        yield
+    finally:
+        # shutdown / cleanup
+        if app.state.batcher is not None:
+            await app.state.batcher.stop()
+            app.state.batcher = None
+        app.state.infer_pool.shutdown(wait=True)
+        app.state.infer_pool = None
+        MODEL = None
     # Note: we don't remove uploaded files on shutdown
     
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 @app.get("/health")
 async def health():
@@ -61,46 +128,51 @@ async def health():
         }
     except Exception:
         meta = None
-    return {"status": "ok", "model": meta}
+    return ORJSONResponse({"status": "ok", "model": meta})
+
+def _has_image_signature(head: bytes) -> bool:
+    # cheap magic-bytes check on the first chunk (JPEG, PNG, WebP)
+    return (
+        head.startswith(b"\xff\xd8\xff")
+        or head.startswith(b"\x89PNG\r\n\x1a\n")
+        or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+    )
 
 def _secure_filename(filename: str) -> str:
     # simple sanitization: keep only basename
     return Path(filename).name
 
-@app.post("/predict")
-async def predict(file: UploadFile = File(...)):
+async def _read_upload(file: UploadFile) -> bytes:
+    """
+    Validate content type, size, magic bytes and (if Pillow is installed) image
+    integrity of an upload, fully in memory. Raises HTTPException on rejection.
+    """
     # validate content type
     content_type = (file.content_type or "").lower()
     if content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail=f"unsupported content type: {content_type}")
 
-    out_dir = UPLOAD_DIR
-    out_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = _secure_filename(file.filename or "upload")
-    file_id = f"{uuid.uuid4().hex}_{safe_name}"
-    path = out_dir / file_id
+    # reject early when the multipart parser already knows the upload is too large
+    if (getattr(file, "size", None) or 0) > MAX_UPLOAD_SIZE:
+        await file.close()
+        raise HTTPException(status_code=413, detail="file too large")
 
-    # stream-write to disk and enforce size limit without buffering whole file in memory
-    uploaded = 0
+    # stream the upload into memory and enforce size limit before anything touches disk
+    buf = bytearray()
     try:
-        with path.open("wb") as f:
-            chunk_size = 1024 * 1024
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                uploaded += len(chunk)
-                if uploaded > MAX_UPLOAD_SIZE:
-                    # remove partial file and abort
-                    f.close()
-                    try:
-                        path.unlink()
-                    except FileNotFoundError:
-                        pass
-                    raise HTTPException(status_code=413, detail="file too large")
-                f.write(chunk)
-
-        # optional image validation if Pillow is installed
+        chunk_size = 1024 * 1024
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            if not buf and not _has_image_signature(chunk[:12]):
+                # reject bogus payloads before streaming the rest of the body
+                raise HTTPException(status_code=400, detail="invalid image file")
+            if len(buf) + len(chunk) > MAX_UPLOAD_SIZE:
+                raise HTTPException(status_code=413, detail="file too large")
+            buf += chunk
+
+        # optional image validation if Pillow is installed (from memory, no disk read-back)
         try:
             from PIL import Image
         except Exception:
@@ -108,23 +180,68 @@ async def predict(file: UploadFile = File(...)):
 
         if Image is not None:
             try:
-                with Image.open(path) as img:
+                with Image.open(BytesIO(buf)) as img:
+                    width, height = img.size  # header only, nothing decoded yet
                     img.verify()  # will raise if file is not a valid image
             except Exception:
-                try:
-                    path.unlink()
-                except FileNotFoundError:
-                    pass
                 raise HTTPException(status_code=400, detail="invalid image file")
+            # small compressed files can still decode to huge arrays; cap before decoding
+            if width * height > MAX_IMAGE_PIXELS:
+                raise HTTPException(status_code=413, detail="image dimensions too large")
     finally:
         await file.close()
 
+    return bytes(buf)
+
+async def _persist_upload(data: bytes, filename: Optional[str]) -> Optional[str]:
+    # only hit disk when uploads are explicitly persisted
+    if not PERSIST_UPLOADS:
+        return None
+    out_dir = UPLOAD_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    safe_name = _secure_filename(filename or "upload")
+    path = str(out_dir / f"{uuid.uuid4().hex}_{safe_name}")
+    await asyncio.to_thread(Path(path).write_bytes, data)
+    return path
+
+@app.post("/predict")
+async def predict(file: UploadFile = File(...)):
+    data = await _read_upload(file)
+    path = await _persist_upload(data, file.filename)
+
+    if MODEL is None:
+        return ORJSONResponse({"message": "model not loaded (dry-run)", "path": path})
+
+    try:
+        batcher = getattr(app.state, "batcher", None)
+        if batcher is not None:
+            # decode off the event loop, then coalesce with concurrent requests
+            image = await asyncio.to_thread(decode_image_bytes, data)
+            result = await batcher.submit(image)
+        else:
+            # run blocking inference on the dedicated pool (default executor if lifespan didn't run)
+            pool = getattr(app.state, "infer_pool", None)
+            result = await asyncio.get_running_loop().run_in_executor(pool, MODEL.infer_bytes, data)
+        return ORJSONResponse({"result": result, "path": path})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict_batch")
+async def predict_batch(files: List[UploadFile] = File(...)):
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"too many files (max {MAX_BATCH_FILES})")
+
+    datas = [await _read_upload(f) for f in files]
+    paths = [await _persist_upload(d, f.filename) for d, f in zip(datas, files)]
+
     if MODEL is None:
-        return JSONResponse({"message": "model not loaded (dry-run)", "path": str(path)})
+        return ORJSONResponse({"message": "model not loaded (dry-run)", "paths": paths})
 
     try:
-        # run blocking inference off the event loop if needed
-        result = await asyncio.to_thread(MODEL.infer, str(path))
-        return JSONResponse({"result": result, "path": str(path)})
+        images = await asyncio.to_thread(lambda: [decode_image_bytes(d) for d in datas])
+        names = [_secure_filename(f.filename or f"upload_{i}") for i, f in enumerate(files)]
+        pool = getattr(app.state, "infer_pool", None)
+        results = await asyncio.get_running_loop().run_in_executor(pool, MODEL.infer_batch, images, names)
+        return ORJSONResponse({"results": results, "paths": paths})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,44 +1,71 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
-import tempfile
+from typing import Any, Dict, List, Optional
+from io import BytesIO
 from pathlib import Path
 
+import numpy as np
+
+from .utils.postprocess import empty_detections
+
 class BaseModel(ABC):
     @abstractmethod
     def load(self, weights_path: Optional[str] = None) -> None:
         ...
 
     @abstractmethod
-    def infer(self, image_path: str) -> Dict[str, Any]:
+    def infer(self, image_path: str, schema: Optional[str] = None) -> Dict[str, Any]:
+        """schema overrides the SCHEMA env layout (aos|soa|struct) for this call."""
         ...
 
     @abstractmethod
     def infer_bytes(self, image_bytes: bytes) -> Dict[str, Any]:
         ...
 
+    def infer_batch(self, images: List[Any], image_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Run inference over decoded HxWx3 BGR uint8 arrays. This default re-encodes
+        each array as PNG and calls infer_bytes per image; adapters with native
+        batching override it.
+        """
+        from PIL import Image
+
+        names = image_names or [f"<image:{i}>" for i in range(len(images))]
+        out = []
+        for img, name in zip(images, names):
+            buf = BytesIO()
+            Image.fromarray(np.ascontiguousarray(np.asarray(img)[..., ::-1])).save(buf, format="PNG")
+            result = self.infer_bytes(buf.getvalue())
+            result["image"] = name
+            out.append(result)
+        return out
+
 class StubModel(BaseModel):
     """
     Lightweight stub that returns the standardized schema used across adapters:
       {"image": str, "width": Optional[int], "height": Optional[int],
        "detections": [ { "box":[x1,y1,x2,y2], "score":float, "class_id":int, "label":str } ],
        "model": {"adapter": "stub", "mode": "dry-run", "version": None}}
+    With SCHEMA=soa, "detections" is instead
+      {"boxes": [[x1,y1,x2,y2], ...], "scores": [...], "class_ids": [...], "labels": [...]}
     """
     def load(self, weights_path: Optional[str] = None) -> None:
         # no real weights; just mark loaded
         print("StubModel loaded (no weights)")
 
-    def infer(self, image_path: str) -> Dict[str, Any]:
+    def infer(self, image_path: str, schema: Optional[str] = None) -> Dict[str, Any]:
         # return empty but stable schema
         return {
             "image": str(Path(image_path)),
             "width": None,
             "height": None,
-            "detections": [],
+            "detections": empty_detections(schema),
             "model": {"adapter": "stub", "mode": "dry-run", "version": None},
         }
 
     def infer_bytes(self, image_bytes: bytes) -> Dict[str, Any]:
-        t = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-        t.write(image_bytes)
-        t.close()
-        return self.infer(t.name)
\ No newline at end of file
+        # the stub never reads the image; report bytes input like the adapters do
+        return self.infer("<bytes>")
+
+    def infer_batch(self, images: List[Any], image_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        names = image_names or [f"<image:{i}>" for i in range(len(images))]
+        return [self.infer(name) for name in names]
\ No newline at end of file
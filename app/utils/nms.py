@@ -0,0 +1,89 @@
+from typing import Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _nms_loop(boxes: np.ndarray, scores: np.ndarray, iou_thr: float) -> np.ndarray:
+    """
+    Greedy NMS over (N,4) xyxy float32 boxes. Written as plain loops over a flat
+    area array and an in-place suppression mask so numba can compile it.
+    Returns kept indices (int32) in descending score order.
+    """
+    n = boxes.shape[0]
+    order = np.argsort(-scores)
+    areas = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        areas[i] = max(boxes[i, 2] - boxes[i, 0], 0.0) * max(boxes[i, 3] - boxes[i, 1], 0.0)
+    suppressed = np.zeros(n, dtype=np.bool_)
+    keep = np.empty(n, dtype=np.int32)
+    k = 0
+    for oi in range(n):
+        i = order[oi]
+        if suppressed[i]:
+            continue
+        keep[k] = i
+        k += 1
+        for oj in range(oi + 1, n):
+            j = order[oj]
+            if suppressed[j]:
+                continue
+            w = min(boxes[i, 2], boxes[j, 2]) - max(boxes[i, 0], boxes[j, 0])
+            h = min(boxes[i, 3], boxes[j, 3]) - max(boxes[i, 1], boxes[j, 1])
+            if w <= 0.0 or h <= 0.0:
+                continue
+            inter = w * h
+            union = areas[i] + areas[j] - inter
+            if union > 0.0 and inter / union > iou_thr:
+                suppressed[j] = True
+    return keep[:k]
+
+def _nms_numpy(boxes: np.ndarray, scores: np.ndarray, iou_thr: float) -> np.ndarray:
+    """Vectorized NumPy fallback: one IoU row per kept box."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    order = np.argsort(-scores)
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        union = areas[i] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[iou <= iou_thr]
+    return np.asarray(keep, dtype=np.int32)
+
+# numba is optional: compile the loop kernel when available, otherwise use NumPy
+try:
+    import numba  # type: ignore
+    _nms_kernel = numba.njit(cache=True, fastmath=True)(_nms_loop)
+    HAS_NUMBA = True
+except Exception as e:
+    logger.debug("numba unavailable, using NumPy NMS: %s", e)
+    _nms_kernel = _nms_numpy
+    HAS_NUMBA = False
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_thr: float = 0.45,
+    classes: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Greedy non-maximum suppression. If `classes` is given, suppression is
+    per-class (boxes are offset by class id so different classes never overlap).
+    Returns indices into the inputs (int32), highest score first.
+    """
+    boxes = np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.ascontiguousarray(scores, dtype=np.float32).reshape(-1)
+    if boxes.shape[0] == 0:
+        return np.zeros((0,), dtype=np.int32)
+    if classes is not None:
+        # span of all coordinates (not just the max) so unclipped/negative boxes stay separated
+        offset = float(boxes.max() - boxes.min()) + 1.0
+        boxes = boxes + (np.asarray(classes, dtype=np.float32).reshape(-1, 1) * offset)
+    return _nms_kernel(boxes, scores, float(iou_thr))
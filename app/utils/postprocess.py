@@ -1,23 +1,162 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
+import os
+
+import numpy as np
+
+# "aos" (default): detections is a list of per-box dicts
+# "soa": detections is a dict of parallel arrays (boxes, scores, class_ids, labels)
+# "struct": detections is a numpy record array (in-process callers only, not JSON-serializable)
+SCHEMA_AOS = "aos"
+SCHEMA_SOA = "soa"
+SCHEMA_STRUCT = "struct"
+
+def detection_schema() -> str:
+    """Detection layout selected via the SCHEMA env var (aos|soa)."""
+    schema = os.getenv("SCHEMA", SCHEMA_AOS).lower()
+    return schema if schema in (SCHEMA_AOS, SCHEMA_SOA) else SCHEMA_AOS
+
+def empty_detections(schema: Optional[str] = None) -> Union[List[Dict[str, Any]], Dict[str, List[Any]], np.recarray]:
+    """Empty detections in the requested layout."""
+    schema = schema or detection_schema()
+    if schema == SCHEMA_SOA:
+        return {"boxes": [], "scores": [], "class_ids": [], "labels": []}
+    if schema == SCHEMA_STRUCT:
+        return format_detections_struct(np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32), np.zeros((0,), dtype=np.int32))
+    return []
+
+def build_labels_list(names: Optional[Dict[int, str]] = None) -> List[str]:
+    """
+    Build a list indexed by class id from a {class_id: label} mapping so that
+    per-detection label lookup is a list index instead of a dict lookup.
+    Gaps in the mapping fall back to str(class_id).
+    """
+    names = names or {}
+    ids = [k for k in names if isinstance(k, int) and k >= 0]
+    if not ids:
+        return []
+    return [names.get(i, str(i)) for i in range(max(ids) + 1)]
 
 def format_detections(
     boxes: List[List[float]],
     scores: List[float],
     classes: List[int],
     names: Optional[Dict[int, str]] = None,
+    labels_list: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Convert raw arrays to a stable detection schema:
       {"box": [x1,y1,x2,y2], "score": float, "class_id": int, "label": str}
     """
-    names = names or {}
+    if labels_list is None:
+        labels_list = build_labels_list(names)
+    n_labels = len(labels_list)
     out = []
     for b, s, c in zip(boxes, scores, classes):
-        label = names.get(int(c), str(int(c)))
+        ci = int(c)
+        label = labels_list[ci] if 0 <= ci < n_labels else str(ci)
         out.append({
             "box": [float(b[0]), float(b[1]), float(b[2]), float(b[3])],
             "score": float(s),
-            "class_id": int(c),
+            "class_id": ci,
             "label": label,
         })
-    return out
\ No newline at end of file
+    return out
+
+def format_detections_np(
+    boxes_np: np.ndarray,
+    scores_np: np.ndarray,
+    classes_np: np.ndarray,
+    names: Optional[Dict[int, str]] = None,
+    labels_list: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Same schema as format_detections, but takes numpy arrays (N,4), (N,), (N,)
+    and converts each array to python scalars with a single tolist() call
+    instead of coercing every element individually.
+    """
+    if labels_list is None:
+        labels_list = build_labels_list(names)
+    n_labels = len(labels_list)
+    boxes_np = boxes_np.astype(np.float32, copy=False).reshape(-1, 4)
+    scores_np = scores_np.astype(np.float32, copy=False)
+    classes_np = classes_np.astype(np.int64, copy=False)
+    out = []
+    for b, s, c in zip(boxes_np.tolist(), scores_np.tolist(), classes_np.tolist()):
+        out.append({
+            "box": b,
+            "score": s,
+            "class_id": c,
+            "label": labels_list[c] if 0 <= c < n_labels else str(c),
+        })
+    return out
+
+def format_detections_soa(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    classes: np.ndarray,
+    names: Optional[Dict[int, str]] = None,
+    labels_list: Optional[List[str]] = None,
+) -> Dict[str, List[Any]]:
+    """
+    Struct-of-arrays variant of format_detections_np:
+      {"boxes": [[x1,y1,x2,y2], ...], "scores": [...], "class_ids": [...], "labels": [...]}
+    """
+    if labels_list is None:
+        labels_list = build_labels_list(names)
+    n_labels = len(labels_list)
+    class_ids = classes.astype(np.int64, copy=False).tolist()
+    return {
+        "boxes": boxes.astype(np.float32, copy=False).reshape(-1, 4).tolist(),
+        "scores": scores.astype(np.float32, copy=False).tolist(),
+        "class_ids": class_ids,
+        "labels": [labels_list[c] if 0 <= c < n_labels else str(c) for c in class_ids],
+    }
+
+def format_detections_struct(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    classes: np.ndarray,
+) -> np.recarray:
+    """
+    Record-array variant for in-process callers, with fields
+      x1, y1, x2, y2, score (float32) and class_id (int32)
+    so downstream filtering is vectorized, e.g. `dets[dets.score > 0.5]`.
+    """
+    boxes = boxes.astype(np.float32, copy=False).reshape(-1, 4)
+    return np.rec.fromarrays(
+        [boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3], scores.astype(np.float32, copy=False), classes.astype(np.int32)],
+        names="x1,y1,x2,y2,score,class_id",
+    )
+
+def decode_yolo_output(
+    pred: np.ndarray,
+    conf_thr: float,
+    scale: float,
+    pad: Tuple[int, int],
+    orig_shape: Tuple[int, int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode a raw YOLOv8-style head output, either the exported (1, 4+nc, N)
+    tensor or an already transposed (N, 4+nc) array of (cx, cy, w, h, scores...)
+    rows, into pre-NMS xyxy boxes in original image coordinates, scores and
+    class ids, keeping rows above `conf_thr`.
+    """
+    pred = np.asarray(pred, dtype=np.float32)
+    if pred.ndim == 3:
+        pred = pred[0].T
+    cls_scores = pred[:, 4:]
+    classes = cls_scores.argmax(axis=1)
+    scores = cls_scores[np.arange(len(pred)), classes]
+    mask = scores > conf_thr
+    xywh, scores, classes = pred[mask, :4], scores[mask], classes[mask]
+
+    boxes = np.empty_like(xywh)
+    boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+    # undo letterbox: remove the integer paste offset, rescale, clip to the original image
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= scale
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, orig_shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, orig_shape[0])
+    return boxes, scores, classes.astype(np.int64)
@@ -0,0 +1,44 @@
+from io import BytesIO
+from typing import Tuple
+
+import numpy as np
+
+def decode_image_bytes(data: bytes) -> np.ndarray:
+    """
+    Decode encoded image bytes (JPEG/PNG/WebP) to an HxWx3 uint8 BGR array,
+    the channel order ultralytics expects for numpy sources. The EXIF
+    Orientation tag is applied, matching path-based loading.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as img:
+        arr = np.asarray(ImageOps.exif_transpose(img).convert("RGB"))
+    return np.ascontiguousarray(arr[..., ::-1])
+
+def letterbox(
+    img: np.ndarray,
+    new_shape: Tuple[int, int] = (640, 640),
+    color: int = 114,
+) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize an HxWx3 image keeping aspect ratio and pad to `new_shape` (h, w),
+    matching ultralytics' letterbox. Returns (image, scale, (left, top)) where
+    (left, top) is the integer offset the resized image was pasted at.
+    """
+    from PIL import Image
+
+    h, w = img.shape[:2]
+    r = min(new_shape[0] / h, new_shape[1] / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    if (nw, nh) != (w, h):
+        img = np.asarray(Image.fromarray(img).resize((nw, nh), Image.BILINEAR))
+    pad_w, pad_h = (new_shape[1] - nw) / 2, (new_shape[0] - nh) / 2
+    top, left = int(round(pad_h - 0.1)), int(round(pad_w - 0.1))
+    out = np.full((new_shape[0], new_shape[1], 3), color, dtype=np.uint8)
+    out[top:top + nh, left:left + nw] = img
+    return out, r, (left, top)
+
+def to_model_input(img: np.ndarray) -> np.ndarray:
+    """BGR HWC uint8 -> RGB NCHW float32 in [0, 1] with a leading batch dim."""
+    x = img[..., ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(x, dtype=np.float32)[None] / np.float32(255.0)
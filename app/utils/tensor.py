@@ -0,0 +1,30 @@
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+
+def stack_arrays(arrs: Union[np.ndarray, Sequence[Any]]) -> np.ndarray:
+    """
+    Collapse a list of same-shape arrays into one contiguous (N, ...) ndarray
+    with a single np.stack call. An ndarray input is returned as-is.
+    """
+    if isinstance(arrs, np.ndarray):
+        return arrs
+    return np.stack([np.asarray(a) for a in arrs], axis=0)
+
+def to_tensor(arrs: Union[np.ndarray, Sequence[Any]], device: Optional[Any] = None) -> Any:
+    """
+    Convert an ndarray or a list of ndarrays to a torch.Tensor.
+
+    Lists are stacked once with NumPy and wrapped with torch.from_numpy (zero-copy),
+    avoiding torch.tensor([ndarray, ...]), which converts element by element.
+    A list of tensors is stacked with torch.stack.
+    """
+    import torch  # type: ignore
+
+    if isinstance(arrs, torch.Tensor):
+        t = arrs
+    elif isinstance(arrs, (list, tuple)) and arrs and all(isinstance(a, torch.Tensor) for a in arrs):
+        t = torch.stack(list(arrs), dim=0)
+    else:
+        t = torch.from_numpy(np.ascontiguousarray(stack_arrays(arrs)))
+    return t.to(device) if device is not None else t
@@ -53,11 +53,16 @@ def cmd_predict(args: argparse.Namespace) -> int:
 
     client = YoloHTTPClient(args.url, api_key=args.api_key)
 
+    async def _predict_async():
+        async with client:
+            return await client.predict_async(image)
+
     try:
         if args.use_async:
-            out = asyncio.run(client.predict_async(image))
+            out = asyncio.run(_predict_async())
         else:
-            out = client.predict(image)
+            with client:
+                out = client.predict(image)
         _print_json(out)
         return 0
     except Exception as e:
@@ -1,12 +1,52 @@
+import math
 import mimetypes
+import random
+import re
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
 import time
 import asyncio
 
+import anyio
 import httpx
 
 DEFAULT_TIMEOUT = 30.0
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# HTML5 form encoding for quoted header params (what httpx does): escape backslash,
+# and percent-encode quotes and control characters so CR/LF can't inject headers
+_FILENAME_UNSAFE = re.compile(r'[\\"\x00-\x1f]')
+_FILENAME_ESCAPES = {"\\": "\\\\", '"': "%22"}
+
+
+def _multipart_envelope(field: str, filename: str, mime: str) -> Tuple[str, bytes, bytes]:
+    """Boundary plus the bytes that go before and after a single file part."""
+    boundary = uuid.uuid4().hex
+    safe_name = _FILENAME_UNSAFE.sub(
+        lambda m: _FILENAME_ESCAPES.get(m.group(), "%%%02X" % ord(m.group())), filename
+    )
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{safe_name}"\r\n'
+        f"Content-Type: {mime}\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+    return boundary, head, tail
+
+
+async def _aiter_multipart(path: Path, head: bytes, tail: bytes) -> AsyncIterator[bytes]:
+    # read the file in chunks without blocking the event loop
+    yield head
+    async with await anyio.open_file(path, "rb") as f:
+        while True:
+            chunk = await f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    yield tail
 
 
 class YoloHTTPClient:
@@ -18,8 +58,16 @@ class YoloHTTPClient:
 
     Constructor args added:
       retries: number of attempts (default 3)
-      backoff_factor: base backoff in seconds (exponential backoff)
+      backoff_factor: base backoff in seconds (exponential backoff with full jitter;
+                      a Retry-After header on the response is honored as a minimum)
+      max_backoff: upper bound on any single wait in seconds (default 60); if the
+                   server's Retry-After asks for longer, the call fails immediately
       retry_statuses: set of integer HTTP statuses to retry
+
+    The underlying httpx.Client (and lazily created httpx.AsyncClient) are reused
+    across calls so connections stay pooled; use the client as a (async) context
+    manager or call close()/aclose() when done. A closed client can still be used:
+    fresh connection pools are opened on the next call.
     """
 
     def __init__(
@@ -30,12 +78,14 @@ class YoloHTTPClient:
         retries: int = 3,
         backoff_factor: float = 0.5,
         retry_statuses: Optional[Set[int]] = None,
+        max_backoff: float = 60.0,
     ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
         self.retries = max(1, int(retries))
         self.backoff_factor = float(backoff_factor)
+        self.max_backoff = float(max_backoff)
         # default retry statuses: 429 and 5xx
         if retry_statuses is None:
             self.retry_statuses = {429, 500, 502, 503, 504}
@@ -46,9 +96,84 @@ class YoloHTTPClient:
         if api_key:
             self._headers["Authorization"] = f"Bearer {api_key}"
 
-    def _get_backoff(self, attempt: int) -> float:
-        # exponential backoff: backoff_factor * (2 ** (attempt-1))
-        return self.backoff_factor * (2 ** (attempt - 1))
+        self._client = httpx.Client(headers=self._headers, timeout=self.timeout)
+        # created on first async use: an AsyncClient's pooled connections belong to the
+        # event loop that opened them, so it is rebuilt when used from a different loop
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aloop: Optional[asyncio.AbstractEventLoop] = None
+
+    def close(self) -> None:
+        self._client.close()
+        # an AsyncClient can only be closed from async code on its own loop; drop it
+        # so the next async call builds a new one
+        self._aclient = None
+        self._aloop = None
+
+    async def aclose(self) -> None:
+        self._client.close()
+        if self._aclient is not None:
+            if self._aloop is asyncio.get_running_loop():
+                await self._aclient.aclose()
+            self._aclient = None
+            self._aloop = None
+
+    def __enter__(self) -> "YoloHTTPClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "YoloHTTPClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    def _get_client(self) -> httpx.Client:
+        if self._client.is_closed:
+            self._client = httpx.Client(headers=self._headers, timeout=self.timeout)
+        return self._client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aloop is not loop:
+            # the previous loop (e.g. an earlier asyncio.run) may be closed, so its
+            # client can't be awaited to close; just drop it
+            self._aclient = httpx.AsyncClient(headers=self._headers, timeout=self.timeout)
+            self._aloop = loop
+        return self._aclient
+
+    @staticmethod
+    def _parse_retry_after(response: Optional[Any]) -> Optional[float]:
+        # Retry-After may be delta-seconds or an HTTP-date
+        headers = getattr(response, "headers", None)
+        value = headers.get("Retry-After") if headers is not None else None
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+            return max(0.0, seconds) if math.isfinite(seconds) else None
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+    def _get_backoff(self, attempt: int, response: Optional[Any] = None) -> Optional[float]:
+        # full jitter: uniform(0, backoff_factor * 2 ** (attempt-1)) so clients don't retry in lockstep
+        backoff = random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1))))
+        # a server-provided Retry-After is a lower bound; None means it asks for
+        # longer than max_backoff, so the caller should give up instead of waiting
+        retry_after = self._parse_retry_after(response)
+        if retry_after is not None:
+            if retry_after > self.max_backoff:
+                return None
+            backoff = max(backoff, retry_after)
+        return backoff
 
     def predict(self, image_path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         p = Path(image_path)
@@ -62,9 +187,10 @@ class YoloHTTPClient:
 
         for attempt in range(1, self.retries + 1):
             try:
-                with httpx.Client(headers=self._headers, timeout=self.timeout) as client, p.open("rb") as f:
+                # httpx streams multipart parts from an open file handle in chunks
+                with p.open("rb") as f:
                     files = {"file": (p.name, f, mime)}
-                    r = client.post(url, files=files, params=params or {})
+                    r = self._get_client().post(url, files=files, params=params or {})
                     # retry on configured statuses
                     if r.status_code in self.retry_statuses:
                         last_exc = httpx.HTTPStatusError(f"{r.status_code} response", request=r.request, response=r)
@@ -75,7 +201,9 @@ class YoloHTTPClient:
                 last_exc = e
                 if attempt == self.retries:
                     break
-                backoff = self._get_backoff(attempt)
+                backoff = self._get_backoff(attempt, getattr(e, "response", None))
+                if backoff is None:
+                    break
                 time.sleep(backoff)
 
         # All retries exhausted
@@ -93,21 +221,27 @@ class YoloHTTPClient:
 
         for attempt in range(1, self.retries + 1):
             try:
-                headers = dict(self._headers)
-                async with httpx.AsyncClient(headers=headers, timeout=self.timeout) as client:
-                    with p.open("rb") as f:
-                        files = {"file": (p.name, f, mime)}
-                        r = await client.post(url, files=files, params=params or {})
-                        if r.status_code in self.retry_statuses:
-                            last_exc = httpx.HTTPStatusError(f"{r.status_code} response", request=r.request, response=r)
-                            raise last_exc
-                        r.raise_for_status()
-                        return r.json()
+                client = self._get_async_client()
+                # stream a hand-built multipart body: httpx's files= reads file objects synchronously
+                boundary, head, tail = _multipart_envelope("file", p.name, mime)
+                size = (await anyio.Path(p).stat()).st_size
+                headers = {
+                    "Content-Type": f"multipart/form-data; boundary={boundary}",
+                    "Content-Length": str(len(head) + size + len(tail)),
+                }
+                r = await client.post(url, content=_aiter_multipart(p, head, tail), headers=headers, params=params or {})
+                if r.status_code in self.retry_statuses:
+                    last_exc = httpx.HTTPStatusError(f"{r.status_code} response", request=r.request, response=r)
+                    raise last_exc
+                r.raise_for_status()
+                return r.json()
             except (httpx.RequestError, httpx.HTTPStatusError) as e:
                 last_exc = e
                 if attempt == self.retries:
                     break
-                backoff = self._get_backoff(attempt)
+                backoff = self._get_backoff(attempt, getattr(e, "response", None))
+                if backoff is None:
+                    break
                 await asyncio.sleep(backoff)
 
         raise last_exc  # type: ignore
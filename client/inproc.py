@@ -1,13 +1,17 @@
 from typing import Any, Dict, Optional
 
 
-def predict_inproc(image_path: str, model: Optional[Any] = None, adapter: Optional[str] = None, weights: Optional[str] = None) -> Dict[str, Any]:
+def predict_inproc(image_path: str, model: Optional[Any] = None, adapter: Optional[str] = None, weights: Optional[str] = None, output: Optional[str] = None) -> Dict[str, Any]:
     """
     In-process wrapper that reuses `app.core.predict_inproc`.
 
     Example:
       from client.inproc import predict_inproc
       out = predict_inproc("img.jpg", adapter="stub")
+
+      # numpy record array for vectorized filtering
+      dets = predict_inproc("img.jpg", output="struct")["detections"]
+      dets[dets.score > 0.5]
     """
     try:
         from app.core import predict_inproc as core_predict
@@ -15,4 +19,4 @@ def predict_inproc(image_path: str, model: Optional[Any] = None, adapter: Option
         raise RuntimeError("in-process predict unavailable; ensure your app package is importable") from e
 
     # core_predict will initialize a model if `model` is None
-    return core_predict(image_path, model=model, adapter=adapter, weights=weights)
+    return core_predict(image_path, model=model, adapter=adapter, weights=weights, output=output)
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_coalesces_concurrent_requests():
+    calls = []
+
+    def infer_batch(images):
+        calls.append(list(images))
+        return [{"image": i} for i in images]
+
+    batcher = MicroBatcher(infer_batch, window_s=0.05, max_batch=8)
+    batcher.start()
+    try:
+        out = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+    finally:
+        await batcher.stop()
+
+    assert out == [{"image": 0}, {"image": 1}, {"image": 2}]
+    assert calls == [[0, 1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_errors():
+    def infer_batch(images):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(infer_batch, window_s=0.001)
+    batcher.start()
+    try:
+        with pytest.raises(ValueError):
+            await batcher.submit("x")
+    finally:
+        await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_collates_once_per_flush():
+    import numpy as np
+    from app.utils.tensor import stack_arrays
+
+    seen = []
+
+    def infer_batch(batch):
+        seen.append(batch.shape)
+        return [{"sum": float(x.sum())} for x in batch]
+
+    batcher = MicroBatcher(infer_batch, window_s=0.05, collate=stack_arrays)
+    batcher.start()
+    try:
+        out = await asyncio.gather(*(batcher.submit(np.full((2, 2), i, dtype=np.float32)) for i in range(3)))
+    finally:
+        await batcher.stop()
+
+    assert seen == [(3, 2, 2)]
+    assert [o["sum"] for o in out] == [0.0, 4.0, 8.0]
@@ -68,7 +68,7 @@ async def test_async_retries_and_success(tmp_path):
 
     calls = {"count": 0}
 
-    async def mock_post(self, url, files=None, params=None):
+    async def mock_post(self, url, files=None, params=None, **kwargs):
         calls["count"] += 1
         if calls["count"] <= 2:
             raise httpx.RequestError("simulated async network error")
@@ -100,3 +100,137 @@ def test_retry_on_status_code_then_success(tmp_path):
 
     assert out == {"ok": True}
     assert calls["count"] == 3
+
+
+def test_sync_client_is_reused_across_calls(tmp_path):
+    img_path = _make_temp_file(tmp_path)
+    seen = []
+
+    def mock_post(self, url, files=None, params=None):
+        seen.append(self)
+        return DummyResponse(200, {"ok": True})
+
+    with YoloHTTPClient("http://example.local") as client:
+        with patch.object(httpx.Client, "post", new=mock_post):
+            client.predict(img_path)
+            client.predict(img_path)
+    assert len(seen) == 2
+    assert seen[0] is seen[1] is client._client
+
+
+@pytest.mark.asyncio
+async def test_async_predict_streams_valid_multipart(tmp_path):
+    from io import BytesIO
+    from PIL import Image
+    from app.main import app
+
+    p = tmp_path / "img.jpg"
+    buf = BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="JPEG")
+    p.write_bytes(buf.getvalue())
+
+    client = YoloHTTPClient("http://testserver")
+    client._aclient = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+    client._aloop = asyncio.get_running_loop()
+    async with client:
+        out = await client.predict_async(str(p))
+    assert "path" in out
+
+
+def test_multipart_filename_is_escaped():
+    from client.http import _multipart_envelope
+
+    _, head, _ = _multipart_envelope("file", 'a"b\\c\r\nX-Evil: 1\x00.jpg', "image/jpeg")
+    disposition = head.split(b"\r\n")[1]
+    assert disposition == b'Content-Disposition: form-data; name="file"; filename="a%22b\\\\c%0D%0AX-Evil: 1%00.jpg"'
+    assert head.count(b"\r\n") == 4
+
+
+def test_backoff_jitter_and_retry_after():
+    client = YoloHTTPClient("http://example.local", backoff_factor=1.0)
+    for _ in range(20):
+        assert 0 <= client._get_backoff(3) <= 4.0
+
+    resp = httpx.Response(429, headers={"Retry-After": "7"})
+    assert client._get_backoff(1, resp) >= 7.0
+
+    from datetime import datetime, timedelta, timezone
+    from email.utils import format_datetime
+
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    resp = httpx.Response(503, headers={"Retry-After": when})
+    # HTTP-dates have whole-second resolution
+    assert 28.5 <= client._get_backoff(1, resp) <= 30.0
+
+    # jitter never exceeds max_backoff, and a longer Retry-After means "don't retry"
+    capped = YoloHTTPClient("http://example.local", backoff_factor=100.0, max_backoff=2.0)
+    assert all(0 <= capped._get_backoff(5) <= 2.0 for _ in range(20))
+    assert capped._get_backoff(1, httpx.Response(429, headers={"Retry-After": "1e9"})) is None
+
+
+def test_retry_after_beyond_max_backoff_fails_fast(tmp_path):
+    img_path = _make_temp_file(tmp_path)
+    calls = {"count": 0}
+
+    def mock_post(self, url, files=None, params=None):
+        calls["count"] += 1
+        return httpx.Response(503, headers={"Retry-After": "1e9"}, request=httpx.Request("POST", url))
+
+    client = YoloHTTPClient("http://example.local", retries=3, max_backoff=5.0)
+    with patch.object(httpx.Client, "post", new=mock_post), patch("client.http.time.sleep") as sleep:
+        with pytest.raises(httpx.HTTPStatusError):
+            client.predict(img_path)
+    assert calls["count"] == 1
+    sleep.assert_not_called()
+
+
+@pytest.fixture
+def json_server():
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections outlive a loop
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = json.dumps({"ok": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_client_survives_multiple_event_loops(tmp_path, json_server):
+    img_path = _make_temp_file(tmp_path)
+    client = YoloHTTPClient(json_server, retries=1)
+    try:
+        assert asyncio.run(client.predict_async(img_path)) == {"ok": True}
+        assert asyncio.run(client.predict_async(img_path)) == {"ok": True}
+    finally:
+        client.close()
+
+
+def test_client_is_usable_after_close(tmp_path, json_server):
+    img_path = _make_temp_file(tmp_path)
+    client = YoloHTTPClient(json_server, retries=1)
+    with client:
+        assert client.predict(img_path) == {"ok": True}
+        assert asyncio.run(client.predict_async(img_path)) == {"ok": True}
+    assert client._aclient is None and client._aloop is None
+
+    # both clients are rebuilt on the next call instead of raising "client has been closed"
+    assert client.predict(img_path) == {"ok": True}
+    assert asyncio.run(client.predict_async(img_path)) == {"ok": True}
+    client.close()
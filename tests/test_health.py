@@ -21,21 +21,25 @@ def test_health(tmp_path):
     assert r.status_code == 200
     assert r.json()["status"] == "ok"
     
-def test_predict_save_and_return_path(tmp_path):
-    client, _ = _make_client_with_upload_dir(tmp_path)
-
+def _make_jpeg_bytes() -> bytes:
     # create a small valid JPEG using Pillow to satisfy server image validation
     from io import BytesIO
     try:
         from PIL import Image
     except Exception:
         # fallback to the previous heuristic if Pillow isn't installed
-        img_bytes = b"\xff\xd8" + b"\x00" * 1024 + b"\xff\xd9"
-    else:
-        buf = BytesIO()
-        Image.new("RGB", (10, 10), color=(255, 0, 0)).save(buf, format="JPEG")
-        img_bytes = buf.getvalue()
+        return b"\xff\xd8\xff" + b"\x00" * 1024 + b"\xff\xd9"
+    buf = BytesIO()
+    Image.new("RGB", (10, 10), color=(255, 0, 0)).save(buf, format="JPEG")
+    return buf.getvalue()
 
+def test_predict_save_and_return_path(tmp_path, monkeypatch):
+    client, _ = _make_client_with_upload_dir(tmp_path)
+    import app.main as main
+    monkeypatch.setattr(main, "PERSIST_UPLOADS", True)
+    monkeypatch.setattr(main, "UPLOAD_DIR", tmp_path)
+
+    img_bytes = _make_jpeg_bytes()
     r = client.post("/predict", files={"file": ("test.jpg", img_bytes, "image/jpeg")})
     assert r.status_code == 200
     body = r.json()
@@ -48,8 +52,117 @@ def test_predict_save_and_return_path(tmp_path):
     except Exception:
         pass
 
+def test_predict_does_not_persist_by_default(tmp_path, monkeypatch):
+    client, _ = _make_client_with_upload_dir(tmp_path)
+    import app.main as main
+    monkeypatch.setattr(main, "PERSIST_UPLOADS", False)
+    monkeypatch.setattr(main, "UPLOAD_DIR", tmp_path)
+
+    r = client.post("/predict", files={"file": ("test.jpg", _make_jpeg_bytes(), "image/jpeg")})
+    assert r.status_code == 200
+    assert r.json()["path"] is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_predict_rejects_bad_signature(tmp_path):
+    client, _ = _make_client_with_upload_dir(tmp_path)
+    r = client.post("/predict", files={"file": ("fake.jpg", b"GIF89a" + b"\x00" * 64, "image/jpeg")})
+    assert r.status_code == 400
+
 def test_predict_too_large(tmp_path):
     client, MAX_UPLOAD_SIZE = _make_client_with_upload_dir(tmp_path)
-    big = b"\xff\xd8" + b"\x00" * (MAX_UPLOAD_SIZE + 10) + b"\xff\xd9"
+    big = b"\xff\xd8\xff" + b"\x00" * (MAX_UPLOAD_SIZE + 10) + b"\xff\xd9"
     r = client.post("/predict", files={"file": ("big.jpg", big, "image/jpeg")})
-    assert r.status_code == 413
\ No newline at end of file
+    assert r.status_code == 413
+
+def test_predict_runs_inference_on_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_ADAPTER", "stub")
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    from app.main import app
+    with TestClient(app) as c:
+        assert app.state.infer_pool is not None
+        r = c.post("/predict", files={"file": ("test.jpg", _make_jpeg_bytes(), "image/jpeg")})
+    assert r.status_code == 200
+    assert r.json()["result"]["model"]["adapter"] == "stub"
+    assert app.state.infer_pool is None
+
+
+def test_predict_batch(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_ADAPTER", "stub")
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    from app.main import app
+    files = [
+        ("files", ("a.jpg", _make_jpeg_bytes(), "image/jpeg")),
+        ("files", ("b.jpg", _make_jpeg_bytes(), "image/jpeg")),
+    ]
+    with TestClient(app) as c:
+        r = c.post("/predict_batch", files=files)
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [res["image"] for res in results] == ["a.jpg", "b.jpg"]
+
+
+def test_predict_with_micro_batching(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_ADAPTER", "stub")
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    from app.main import app
+    files = {"file": ("test.jpg", _make_jpeg_bytes(), "image/jpeg")}
+    with TestClient(app) as c:
+        unbatched = c.post("/predict", files=files)
+
+    monkeypatch.setenv("BATCH_WINDOW_MS", "5")
+    with TestClient(app) as c:
+        assert app.state.batcher is not None
+        r = c.post("/predict", files=files)
+    assert r.status_code == 200
+    assert r.json()["result"]["model"]["adapter"] == "stub"
+    # enabling micro-batching must not change the response
+    assert r.json() == unbatched.json()
+    assert r.json()["result"]["image"] == "<bytes>"
+    assert app.state.batcher is None
+
+
+class _WarmupModel:
+    mode = "inference"
+    version = None
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def infer(self, image_path, schema=None):
+        self.calls.append(image_path)
+        if self.fail:
+            raise RuntimeError("warmup boom")
+        return {"image": image_path, "detections": []}
+
+
+def test_lifespan_warms_up_inference_model(tmp_path, monkeypatch):
+    import app.main as main
+
+    model = _WarmupModel()
+    monkeypatch.setattr(main, "get_model", lambda adapter=None, weights=None: model)
+    with TestClient(main.app) as c:
+        assert c.get("/health").json()["model"]["mode"] == "inference"
+    assert model.calls == [str(main.WARMUP_IMAGE)]
+    assert main.WARMUP_IMAGE.exists()
+
+
+def test_lifespan_starts_when_warmup_fails(tmp_path, monkeypatch):
+    import app.main as main
+
+    model = _WarmupModel(fail=True)
+    monkeypatch.setattr(main, "get_model", lambda adapter=None, weights=None: model)
+    with TestClient(main.app) as c:
+        assert c.get("/health").status_code == 200
+    assert model.calls == [str(main.WARMUP_IMAGE)]
+
+
+def test_predict_rejects_images_over_pixel_cap(tmp_path, monkeypatch):
+    import app.main as main
+
+    client, _ = _make_client_with_upload_dir(tmp_path)
+    monkeypatch.setattr(main, "MAX_IMAGE_PIXELS", 50)
+    r = client.post("/predict", files={"file": ("test.jpg", _make_jpeg_bytes(), "image/jpeg")})
+    assert r.status_code == 413
+    r = client.post("/predict_batch", files=[("files", ("test.jpg", _make_jpeg_bytes(), "image/jpeg"))])
+    assert r.status_code == 413
@@ -22,4 +22,354 @@ def test_predict_inproc_uses_loader(tmp_path):
     out = predict_inproc(str(img), adapter="stub")
     assert isinstance(out, dict)
     # predictable dry-run shape
-    assert "detections" in out
\ No newline at end of file
+    assert "detections" in out
+
+def test_stub_soa_schema(tmp_path, monkeypatch):
+    img = tmp_path / "img3.jpg"
+    _make_fake_jpeg(img)
+    monkeypatch.setenv("SCHEMA", "soa")
+
+    out = get_model(adapter="stub").infer(str(img))
+    assert out["detections"] == {"boxes": [], "scores": [], "class_ids": [], "labels": []}
+
+
+def test_yolovx_parse_raw_applies_nms():
+    import numpy as np
+    from app.loader import YolovXAdapter
+
+    m = YolovXAdapter()
+    m._labels_list = ["person", "car"]
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [0, 0, 10, 10]], dtype=np.float32)
+    out = m._parse_raw(boxes, [0.9, 0.8, 0.7], [0, 0, 1], "img.jpg", width=32, height=32)
+    labels = [d["label"] for d in out["detections"]]
+    assert labels == ["person", "car"]
+    assert out["width"] == 32
+
+
+def test_yolovx_onnx_path_decodes_and_unletterboxes():
+    import numpy as np
+    from types import SimpleNamespace
+    from app.loader import YolovXAdapter
+
+    class FakeSession:
+        def get_inputs(self):
+            return [SimpleNamespace(name="images")]
+
+        def run(self, _outputs, feeds):
+            assert feeds["images"].shape == (1, 3, 64, 64)
+            # one confident box (cx, cy, w, h) = (32, 32, 16, 16), class 1; one below threshold
+            pred = np.zeros((1, 6, 2), dtype=np.float32)
+            pred[0, :, 0] = [32, 32, 16, 16, 0.1, 0.9]
+            pred[0, :, 1] = [10, 10, 4, 4, 0.1, 0.1]
+            return [pred]
+
+    m = YolovXAdapter()
+    m.session = FakeSession()
+    m.imgsz = (64, 64)
+    m._labels_list = ["person", "car"]
+    # 32x64 image -> scale 1.0, padded by 16px top/bottom
+    out = m.infer_batch([np.zeros((32, 64, 3), dtype=np.uint8)], ["a.jpg"])[0]
+    assert out["width"] == 64 and out["height"] == 32
+    assert len(out["detections"]) == 1
+    det = out["detections"][0]
+    assert det["label"] == "car"
+    assert det["box"] == [24.0, 8.0, 40.0, 24.0]
+
+    # odd padding: a 33x64 image is pasted at row 15 (pad 15.5), rows 15..47
+    class OddPadSession(FakeSession):
+        def run(self, _outputs, feeds):
+            pred = np.zeros((1, 6, 1), dtype=np.float32)
+            pred[0, :, 0] = [32, 31.5, 64, 33, 0.9, 0.1]
+            return [pred]
+
+    m.session = OddPadSession()
+    out = m.infer_batch([np.zeros((33, 64, 3), dtype=np.uint8)], ["b.jpg"])[0]
+    assert out["detections"][0]["box"] == [0.0, 0.0, 64.0, 33.0]
+
+
+def test_get_model_caches_and_evicts(monkeypatch):
+    from app.loader import clear_model_cache
+
+    clear_model_cache()
+    monkeypatch.setenv("MAX_MODELS", "1")
+    a = get_model(adapter="stub", weights=None)
+    assert get_model(adapter="stub", weights=None) is a
+
+    # a different key evicts the only slot
+    b = get_model(adapter="stub", weights="other.pt")
+    assert b is not a
+    assert get_model(adapter="stub", weights=None) is not a
+    clear_model_cache()
+
+
+def test_resolve_adapter_aliases():
+    from app.loader import _resolve_adapter
+
+    for name in ("yolo", "yolov5", "yolov8", "yolovx", "yolox", "yolov12n", "yolo11s"):
+        assert _resolve_adapter(name) == "yolovx"
+    assert _resolve_adapter("stub") == "stub"
+    assert _resolve_adapter("unknown") == "stub"
+
+
+def test_yolovx_infer_bytes_passes_ndarray(monkeypatch):
+    import numpy as np
+    from io import BytesIO
+    from PIL import Image
+    from app.loader import YolovXAdapter
+
+    seen = {}
+
+    class FakeYOLO:
+        predictor = None
+
+        def predict(self, source=None, **kwargs):
+            seen["source"] = source
+            return []
+
+    buf = BytesIO()
+    Image.new("RGB", (6, 4), color=(255, 0, 0)).save(buf, format="PNG")
+
+    m = YolovXAdapter()
+    m.model = FakeYOLO()
+    out = m.infer_bytes(buf.getvalue())
+    assert out["image"] == "<bytes>"
+    src = seen["source"]
+    assert isinstance(src, np.ndarray) and src.shape == (4, 6, 3)
+    # BGR channel order: red ends up in the last channel
+    assert src[0, 0].tolist() == [0, 0, 255]
+
+
+def test_predict_inproc_struct_output(tmp_path):
+    img = tmp_path / "img4.jpg"
+    _make_fake_jpeg(img)
+
+    out = predict_inproc(str(img), adapter="stub", output="struct")
+    dets = out["detections"]
+    assert len(dets) == 0
+    assert dets.dtype.names == ("x1", "y1", "x2", "y2", "score", "class_id")
+
+
+def test_base_model_subclass_without_infer_batch():
+    import numpy as np
+    from app.model import BaseModel
+
+    class MinimalModel(BaseModel):
+        def load(self, weights_path=None):
+            pass
+
+        def infer(self, image_path):
+            return {"image": image_path, "detections": []}
+
+        def infer_bytes(self, image_bytes):
+            return {"image": "<bytes>", "size": len(image_bytes), "detections": []}
+
+    m = MinimalModel()
+    out = m.infer_batch([np.zeros((4, 6, 3), dtype=np.uint8)] * 2, ["a.jpg", "b.jpg"])
+    assert [o["image"] for o in out] == ["a.jpg", "b.jpg"]
+    assert all(o["size"] > 0 for o in out)
+
+
+def test_unknown_precision_falls_back_to_fp32(monkeypatch):
+    from app.loader import YolovXAdapter
+
+    monkeypatch.setenv("MODEL_PRECISION", "fp8")
+    m = YolovXAdapter()
+    m.load(None)
+    assert m.precision == "fp32"
+
+
+def _fake_torch(cuda_available: bool):
+    from types import SimpleNamespace
+    return SimpleNamespace(cuda=SimpleNamespace(is_available=lambda: cuda_available))
+
+
+def test_fp16_requires_cuda(monkeypatch):
+    import sys
+    from app.loader import YolovXAdapter
+
+    m = YolovXAdapter()
+    m.precision = "fp16"
+    monkeypatch.setitem(sys.modules, "torch", _fake_torch(False))
+    m._configure_precision()
+    assert m._predict_overrides == {}
+
+    monkeypatch.setitem(sys.modules, "torch", _fake_torch(True))
+    m._configure_precision()
+    assert m._predict_overrides == {"half": True}
+
+
+def test_quantize_int8_writes_and_reuses_cached_file(tmp_path, monkeypatch):
+    import sys
+    from types import ModuleType, SimpleNamespace
+    from app.loader import YolovXAdapter
+
+    calls = []
+
+    def quantize_dynamic(src, dst, weight_type=None):
+        calls.append((src, dst, weight_type))
+        Path(dst).write_bytes(b"int8")
+
+    quant = ModuleType("onnxruntime.quantization")
+    quant.QuantType = SimpleNamespace(QInt8="QInt8", QUInt8="QUInt8")
+    quant.quantize_dynamic = quantize_dynamic
+    monkeypatch.setitem(sys.modules, "onnxruntime", ModuleType("onnxruntime"))
+    monkeypatch.setitem(sys.modules, "onnxruntime.quantization", quant)
+
+    onnx_path = tmp_path / "yolo.onnx"
+    onnx_path.write_bytes(b"fp32")
+    m = YolovXAdapter()
+
+    out = m._quantize_int8(onnx_path)
+    assert out == tmp_path / "yolo.int8.onnx"
+    assert out.read_bytes() == b"int8"
+    assert calls == [(str(onnx_path), str(out), "QUInt8")]
+
+    # second call reuses the cached file
+    assert m._quantize_int8(onnx_path) == out
+    assert len(calls) == 1
+
+
+def test_int8_session_failure_drops_cached_quantized_model(tmp_path, monkeypatch):
+    import sys
+    import pytest
+    from types import ModuleType, SimpleNamespace
+    from app.loader import YolovXAdapter
+
+    def session(*args, **kwargs):
+        raise RuntimeError("NOT_IMPLEMENTED: ConvInteger")
+
+    ort = ModuleType("onnxruntime")
+    ort.SessionOptions = SimpleNamespace
+    ort.InferenceSession = session
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+
+    onnx_path = tmp_path / "yolo.onnx"
+    onnx_path.write_bytes(b"fp32")
+    quant_path = tmp_path / "yolo.int8.onnx"
+    quant_path.write_bytes(b"int8")
+    m = YolovXAdapter()
+    m.precision = "int8"
+
+    with pytest.raises(RuntimeError):
+        m._load_onnx(str(onnx_path))
+    assert not quant_path.exists()
+    assert onnx_path.exists()
+
+
+def test_prefetch_weights_reads_file_with_willneed(tmp_path, monkeypatch):
+    import os
+    from app.loader import prefetch_weights
+
+    calls = []
+    monkeypatch.setattr(os, "posix_fadvise", lambda fd, off, length, advice: calls.append(advice), raising=False)
+    monkeypatch.setattr(os, "POSIX_FADV_WILLNEED", 3, raising=False)
+
+    w = tmp_path / "w.pt"
+    w.write_bytes(b"\x00" * 1024)
+    prefetch_weights(str(w), chunk_size=100)
+    assert calls == [os.POSIX_FADV_WILLNEED]
+
+    # missing file: no-op
+    calls.clear()
+    prefetch_weights(str(tmp_path / "missing.pt"))
+    prefetch_weights(None)
+    assert calls == []
+
+
+def test_prefetch_weights_swallows_read_errors(tmp_path, monkeypatch):
+    import app.loader as loader
+
+    class BrokenFile:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def fileno(self):
+            raise OSError("no fd")
+
+        def read(self, n):
+            raise OSError("read failed")
+
+    w = tmp_path / "w.pt"
+    w.write_bytes(b"\x00" * 16)
+    monkeypatch.setattr(loader, "open", lambda *a, **k: BrokenFile(), raising=False)
+    loader.prefetch_weights(str(w))
+
+
+def test_predict_inproc_legacy_infer_signature_and_output_validation(tmp_path):
+    import pytest
+    from app.model import BaseModel
+
+    class LegacyModel(BaseModel):
+        def load(self, weights_path=None):
+            pass
+
+        def infer(self, image_path):
+            return {"image": image_path, "detections": []}
+
+        def infer_bytes(self, image_bytes):
+            return {"image": "<bytes>", "detections": []}
+
+    out = predict_inproc("img.jpg", model=LegacyModel())
+    assert out["image"] == "img.jpg"
+
+    with pytest.raises(ValueError):
+        predict_inproc("img.jpg", adapter="stub", output="columns")
+
+
+def test_yolovx_reuses_predictor_after_init(tmp_path):
+    import numpy as np
+    from io import BytesIO
+    from types import SimpleNamespace
+    from PIL import Image
+    from app.loader import YolovXAdapter
+
+    def _results(source):
+        n = len(source) if isinstance(source, list) else 1
+        return [SimpleNamespace(orig_shape=(4, 6), boxes=None) for _ in range(n)]
+
+    class FakePredictor:
+        def __init__(self):
+            self.sources = []
+
+        def __call__(self, source=None, stream=False):
+            assert stream is False
+            self.sources.append(source)
+            return _results(source)
+
+    class FakeYOLO:
+        predictor = None
+
+        def __init__(self):
+            self.predict_kwargs = []
+
+        def predict(self, source=None, **kwargs):
+            self.predict_kwargs.append(kwargs)
+            self.predictor = FakePredictor()
+            return _results(source)
+
+    m = YolovXAdapter()
+    m.model = FakeYOLO()
+    m._predict_overrides = {"half": True}
+    m._init_predictor()
+    assert m.model.predict_kwargs == [{"verbose": False, "half": True}]
+    predictor = m.model.predictor
+
+    img = tmp_path / "img.png"
+    buf = BytesIO()
+    Image.new("RGB", (6, 4)).save(buf, format="PNG")
+    img.write_bytes(buf.getvalue())
+
+    assert m.infer(str(img))["height"] == 4
+    assert m.infer_bytes(buf.getvalue())["image"] == "<bytes>"
+    out = m.infer_batch([np.zeros((4, 6, 3), dtype=np.uint8)] * 2, ["a", "b"])
+    assert [o["image"] for o in out] == ["a", "b"]
+
+    # every call after init went through the cached predictor, not model.predict
+    assert len(m.model.predict_kwargs) == 1
+    assert len(predictor.sources) == 3
+    assert predictor.sources[0] == str(img)
+    assert isinstance(predictor.sources[1], np.ndarray)
+    assert isinstance(predictor.sources[2], list) and len(predictor.sources[2]) == 2
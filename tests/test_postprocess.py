@@ -0,0 +1,85 @@
+import numpy as np
+
+from app.utils.postprocess import (
+    build_labels_list,
+    format_detections,
+    format_detections_np,
+    format_detections_soa,
+    format_detections_struct,
+)
+
+
+def test_format_detections_np_matches_list_version():
+    boxes = np.array([[1.0, 2.0, 3.0, 4.0], [5.5, 6.5, 7.5, 8.5]], dtype=np.float32)
+    scores = np.array([0.5, 0.25], dtype=np.float32)
+    classes = np.array([0.0, 2.0], dtype=np.float32)
+    names = {0: "person", 1: "bicycle"}
+
+    out = format_detections_np(boxes, scores, classes, names=names)
+    expected = format_detections(boxes.tolist(), scores.tolist(), classes.tolist(), names=names)
+    assert out == expected
+    assert out[0]["label"] == "person"
+    assert out[1]["label"] == "2"
+    assert isinstance(out[1]["class_id"], int)
+
+
+def test_format_detections_np_empty():
+    out = format_detections_np(np.zeros((0, 4)), np.zeros((0,)), np.zeros((0,)))
+    assert out == []
+
+
+def test_build_labels_list_fills_gaps():
+    labels = build_labels_list({0: "person", 2: "car"})
+    assert labels == ["person", "1", "car"]
+    assert build_labels_list({}) == []
+    out = format_detections([[0, 0, 1, 1]], [0.9], [5], labels_list=labels)
+    assert out[0]["label"] == "5"
+
+
+def test_format_detections_soa_parallel_arrays():
+    boxes = np.array([[1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0]], dtype=np.float32)
+    scores = np.array([0.5, 0.25], dtype=np.float32)
+    classes = np.array([1, 3])
+    out = format_detections_soa(boxes, scores, classes, names={0: "person", 1: "bicycle"})
+    assert out == {
+        "boxes": [[1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0]],
+        "scores": [0.5, 0.25],
+        "class_ids": [1, 3],
+        "labels": ["bicycle", "3"],
+    }
+
+
+def test_nms_suppresses_overlaps_and_matches_loop_kernel():
+    from app.utils.nms import _nms_loop, _nms_numpy, nms
+
+    boxes = np.array(
+        [[0, 0, 10, 10], [1, 1, 10, 10], [20, 20, 30, 30], [0, 0, 10, 9]],
+        dtype=np.float32,
+    )
+    scores = np.array([0.9, 0.8, 0.7, 0.95], dtype=np.float32)
+
+    keep = nms(boxes, scores, iou_thr=0.5)
+    assert keep.tolist() == [3, 2]
+    assert _nms_loop(boxes, scores, 0.5).tolist() == _nms_numpy(boxes, scores, 0.5).tolist()
+
+    # class-aware: overlapping boxes of different classes are both kept
+    keep = nms(boxes[:2], scores[:2], iou_thr=0.5, classes=np.array([0, 1]))
+    assert sorted(keep.tolist()) == [0, 1]
+
+    # class separation must also hold for unclipped boxes with negative coordinates
+    neg = np.array([[-50, -50, 0, 0]] * 2, dtype=np.float32)
+    keep = nms(neg, np.array([0.9, 0.8]), iou_thr=0.5, classes=np.array([0, 1]))
+    assert sorted(keep.tolist()) == [0, 1]
+    keep = nms(neg, np.array([0.9, 0.8]), iou_thr=0.5, classes=np.array([1, 1]))
+    assert keep.tolist() == [0]
+
+
+def test_format_detections_struct_columns():
+    boxes = np.array([[1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0]], dtype=np.float32)
+    scores = np.array([0.9, 0.2], dtype=np.float32)
+    classes = np.array([1.0, 3.0], dtype=np.float32)
+    dets = format_detections_struct(boxes, scores, classes)
+    assert dets.dtype.names == ("x1", "y1", "x2", "y2", "score", "class_id")
+    assert dets.class_id.dtype == np.int32
+    kept = dets[dets.score > 0.5]
+    assert len(kept) == 1 and kept.x2[0] == 3.0
@@ -0,0 +1,17 @@
+from io import BytesIO
+
+from PIL import Image
+
+from app.utils.preprocess import decode_image_bytes
+
+
+def test_decode_image_bytes_applies_exif_orientation():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90 CW on display
+    buf = BytesIO()
+    Image.new("RGB", (40, 10), color=(0, 0, 255)).save(buf, format="JPEG", exif=exif)
+
+    arr = decode_image_bytes(buf.getvalue())
+    assert arr.shape == (40, 10, 3)
+    # BGR: blue ends up in the first channel
+    assert arr[20, 5, 0] > 200 and arr[20, 5, 2] < 50
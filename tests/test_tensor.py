@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from app.utils.tensor import stack_arrays
+
+
+def test_stack_arrays_passes_ndarray_through():
+    arr = np.zeros((3, 2), dtype=np.float32)
+    assert stack_arrays(arr) is arr
+
+
+def test_stack_arrays_stacks_list():
+    arrs = [np.full((2, 3), i, dtype=np.uint8) for i in range(4)]
+    out = stack_arrays(arrs)
+    assert out.shape == (4, 2, 3)
+    assert out.dtype == np.uint8
+    assert out[3, 1, 2] == 3
+
+
+def test_stack_arrays_rejects_mismatched_shapes():
+    with pytest.raises(ValueError):
+        stack_arrays([np.zeros((2, 3)), np.zeros((3, 2))])
+
+
+def test_to_tensor_stacks_list_of_arrays():
+    torch = pytest.importorskip("torch")
+    from app.utils.tensor import to_tensor
+
+    arrs = [np.full((2, 3), i, dtype=np.float32) for i in range(4)]
+    t = to_tensor(arrs)
+    assert isinstance(t, torch.Tensor)
+    assert tuple(t.shape) == (4, 2, 3)
+    assert t[3, 0, 0].item() == 3.0